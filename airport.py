@@ -1,4 +1,5 @@
 import json
+import sys
 from datetime import *
 import aiohttp
 import aiofiles
@@ -6,25 +7,41 @@ from typing import Literal
 
 class CustomEncoder(json.JSONEncoder):
     def default(self, o):
-        return o.__dict__
+        if hasattr(o, "__dict__"):
+            return o.__dict__
+        # classes with __slots__ give the same fields as they had in __dict__
+        return o.to_dict()
 
 class Fetcher:
     url = "https://www.hongkongairport.com/flightinfo-rest/rest/flights/past?date={date}&lang=en&cargo=false&arrival={arrival}"
     session: aiohttp.ClientSession
     mode: Literal["static", "dynamic"]
+    airport_info_cache: dict | None = None # shared by all fetchers, the reference data rarely changes
+    airport_info_version: str | None = None # content hash of airport_info_cache
+    airport_info_fetched: float | None = None # timestamp of the download of airport_info_cache
+    touched: set[str] # day files read by this fetcher
+    airport_info_used: bool # whether the airport info was asked for
 
     def __init__(self, loop, mode: Literal["static", "dynamic"] = "static"):
         self.session = aiohttp.ClientSession(loop=loop)
         self.mode = mode
+        self.touched = set()
+        self.airport_info_used = False
         pass
 
+    @staticmethod
+    def static_path(direction: Literal["arrival", "departure"], date):
+        return f"{direction}\\{date.strftime('%Y-%m-%d')}.json"
+
     async def __static_fetch_arival(self, date):
-        async with aiofiles.open(f"arrival\\{date.strftime('%Y-%m-%d')}.json", mode="r") as f:
+        self.touched.add(self.static_path("arrival", date))
+        async with aiofiles.open(self.static_path("arrival", date), mode="r") as f:
             data = await f.read()
             return json.loads(data)
     
     async def __static_fetch_departure(self, date):
-        async with aiofiles.open(f"departure\\{date.strftime('%Y-%m-%d')}.json", mode="r") as f:
+        self.touched.add(self.static_path("departure", date))
+        async with aiofiles.open(self.static_path("departure", date), mode="r") as f:
             data = await f.read()
             return json.loads(data)
         
@@ -66,6 +83,10 @@ class Fetcher:
         """
         import csv
 
+        self.airport_info_used = True
+        if Fetcher.airport_info_cache is not None:
+            return Fetcher.airport_info_cache
+
         async with self.session.get("https://raw.githubusercontent.com/lukes/ISO-3166-Countries-with-Regional-Codes/master/all/all.csv") as response:
             text = await response.text()
             country_mapping = [row for row in csv.DictReader(text.split('\n'))]
@@ -92,58 +113,947 @@ class Fetcher:
                     airport_info[row["iata_code"]] = dict(row | {"name": None})
                     pass
 
+        Fetcher.set_airport_info(airport_info)
         return airport_info
+
+    @staticmethod
+    def set_airport_info(airport_info: dict | None, fetched: float | None = None):
+        """
+            Replaces the shared airport info, fetched is when it was downloaded (default now).
+            None clears it, so the next fetch_airport_info downloads it again.
+        """
+        import hashlib
+
+        Fetcher.airport_info_cache = airport_info
+        if airport_info is None:
+            Fetcher.airport_info_version = Fetcher.airport_info_fetched = None
+            return
+        Fetcher.airport_info_version = hashlib.sha256(json.dumps(airport_info, sort_keys=True).encode()).hexdigest()
+        Fetcher.airport_info_fetched = datetime.now().timestamp() if fetched is None else fetched
     
     async def close(self):
         await self.session.close()
 
 class FlightIdentifier:
+    __slots__ = ("flight_number", "airline")
     flight_number: str
     airline: str
 
     def __init__(self, flight_number, airline):
-        self.flight_number = flight_number
-        self.airline = airline
+        # the same few codes repeat across all flights, keep one copy of each string
+        self.flight_number = sys.intern(flight_number)
+        self.airline = sys.intern(airline)
+
+    def __eq__(self, other):
+        return self.flight_number == other.flight_number and self.airline == other.airline
+
+    def __hash__(self):
+        return hash((self.flight_number, self.airline))
+
+    def to_dict(self) -> dict:
+        return {"flight_number": self.flight_number, "airline": self.airline}
 
 class Flight:
+    __slots__ = ("arrival", "est_minutes", "act_minutes", "utc_offset", "airports", "flight_code", "_est_time", "_act_time", "_delay")
     arrival: bool # is this flight an arrival flight
     est_time: str # estimated arrival / departure time in ISO format
     act_time: str # actual arrival / departure time in ISO format
     airports: list[str] # list of airport(s) that the flight come from / go to
     flight_code: list[FlightIdentifier]
+    est_minutes: int # estimated time in minutes since epoch
+    act_minutes: int # actual time in minutes since epoch
+    utc_offset: int # offset from utc in minutes, only used to present the times
 
     def __init__(self, arrival: bool, est_time: str, act_time: str, airports: list[str], flight_code: list[FlightIdentifier]):
         self.arrival = arrival
         self.est_time = est_time # need to use ISO 8601 here
         self.act_time = act_time # same as above
-        self.airports = airports
+        self.airports = [sys.intern(airport) for airport in airports]
         self.flight_code = [FlightIdentifier(x["no"], x["airline"]) for x in flight_code]
+
+    def to_dict(self) -> dict:
+        """
+            The public fields, the same JSON shape as before the times were kept in minutes
+        """
+        return {
+            "arrival": self.arrival,
+            "est_time": self.est_time,
+            "act_time": self.act_time,
+            "airports": self.airports,
+            "flight_code": self.flight_code,
+        }
+
+    @classmethod
+    def from_minutes(cls, arrival: bool, est_minutes: int, act_minutes: int, airports: list[str], flight_code: list[dict], utc_offset: int = 480):
+        """
+            Builds a flight from times in minutes since epoch, skipping the ISO parsing in __init__
+        """
+        flight = cls.__new__(cls)
+        flight.arrival = arrival
+        flight.est_minutes = est_minutes
+        flight.act_minutes = act_minutes
+        flight.utc_offset = utc_offset
+        flight._est_time = None
+        flight._act_time = None
+        flight._delay = None
+        flight.airports = [sys.intern(airport) for airport in airports]
+        flight.flight_code = [FlightIdentifier(x["no"], x["airline"]) for x in flight_code]
+        return flight
+
+    """
+        The ISO strings are only built when asked for, and kept afterwards
+    """
+
+    def _to_iso(self, minutes):
+        return datetime.fromtimestamp(minutes * 60, timezone(timedelta(minutes=self.utc_offset))).isoformat()
+
+    @property
+    def est_time(self) -> str:
+        if self._est_time is None:
+            self._est_time = self._to_iso(self.est_minutes)
+        return self._est_time
+
+    @est_time.setter
+    def est_time(self, value: str):
+        time = datetime.fromisoformat(value)
+        self.est_minutes = int(time.timestamp()) // 60
+        self.utc_offset = int(time.utcoffset().total_seconds()) // 60
+        self._est_time = value
+        self._delay = None
+
+    @property
+    def act_time(self) -> str:
+        if self._act_time is None:
+            self._act_time = self._to_iso(self.act_minutes)
+        return self._act_time
+
+    @act_time.setter
+    def act_time(self, value: str):
+        time = datetime.fromisoformat(value)
+        self.act_minutes = int(time.timestamp()) // 60
+        self.utc_offset = int(time.utcoffset().total_seconds()) // 60
+        self._act_time = value
+        self._delay = None
+
+    @property
+    def est_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.est_minutes * 60, timezone(timedelta(minutes=self.utc_offset)))
+
+    @property
+    def act_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.act_minutes * 60, timezone(timedelta(minutes=self.utc_offset)))
+
+    @property
+    def delay_minutes(self) -> int:
+        """
+            Actual time minus estimated time in minutes
+        """
+        if self._delay is None:
+            self._delay = self.act_minutes - self.est_minutes
+        return self._delay
     
     """
         Some operator overloading magic down here
     """
 
     def __lt__(self, other):
-        return datetime.fromisoformat(self.act_time) < datetime.fromisoformat(other.act_time)
+        return self.act_minutes < other.act_minutes
     
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return (
+            self.arrival == other.arrival and self.est_minutes == other.est_minutes and self.act_minutes == other.act_minutes
+            and self.airports == other.airports and self.flight_code == other.flight_code
+        )
 
     def __hash__(self):
         """
             This hash function is meant to be used for storing things in a set
         """
-        return hash((self.arrival, self.est_time, self.act_time, '-'.join(self.airports), ';'.join([fc.flight_number for fc in self.flight_code])))
+        return hash((self.arrival, self.est_minutes, self.act_minutes, '-'.join(self.airports), ';'.join([fc.flight_number for fc in self.flight_code])))
+
+class FlightView:
+    """
+        Read-only sequence over some rows of a SharedFlightData direction.
+        Flight objects are built on access so the rows are never copied into a list.
+    """
+    def __init__(self, data: "SharedFlightData", rows, arrival: bool, utc_offset: int):
+        self.data = data
+        self.rows = rows # indices of the selected rows, in actual time order
+        self.arrival = arrival
+        self.utc_offset = utc_offset
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return FlightView(self.data, self.rows[idx], self.arrival, self.utc_offset)
+
+        row = self.rows[idx]
+        columns = self.data.direction_columns(self.arrival)
+        airports = [code.decode() for code in columns["airports"][row] if code]
+        flight_code = [
+            {"no": no.decode(), "airline": airline.decode()}
+            for no, airline in zip(columns["flight_numbers"][row], columns["airlines"][row]) if no
+        ]
+        return Flight.from_minutes(self.arrival, int(columns["est_time"][row]), int(columns["act_time"][row]), airports, flight_code, self.utc_offset)
+
+    def __iter__(self):
+        for idx in range(len(self.rows)):
+            yield self[idx]
+
+class SharedFlightData:
+    """
+        Flight data packed into fixed-width column arrays inside shared memory, so that solvers in
+        several processes can use the same copy of the data without parsing or pickling it again.
+
+        The process calling load() owns the memory blocks and should call unlink() when all workers
+        are done. Worker processes call attach() with the catalogue and close() when they finish.
+    """
+    # column name -> (numpy dtype kind, is 2D)
+    layout = {
+        "est_time": ("i8", False), # estimated time in minutes since epoch
+        "act_time": ("i8", False), # actual time in minutes since epoch
+        "airports": ("S", True), # airport codes, padded with empty strings
+        "flight_numbers": ("S", True), # flight numbers, padded with empty strings
+        "airlines": ("S", True), # airline of each flight number
+    }
+
+    def __init__(self, catalogue: dict, blocks: list, columns: dict, owner: bool):
+        self.catalogue = catalogue
+        self.blocks = blocks
+        self.columns = columns # direction -> column name -> numpy array backed by shared memory
+        self.owner = owner
+        self.first_day = date.fromisoformat(catalogue["first_day"])
+        self.last_day = date.fromisoformat(catalogue["last_day"])
+
+    @classmethod
+    async def load(cls, analyser: "FlightAnalyser", interval: int, tz=8):
+        """
+            Fetches the flights of the last `interval` days once through `analyser` and copies them into shared memory
+        """
+        from multiprocessing import shared_memory
+        import numpy as np
+
+        today = analyser.fixed_date if analyser.client.mode == "static" else datetime.now(timezone(timedelta(hours=tz)))
+        catalogue = {
+            "utc_offset": tz * 60,
+            "first_day": (today - timedelta(days=interval)).date().isoformat(),
+            "last_day": today.date().isoformat(),
+            "arrival": {},
+            "departure": {},
+        }
+        blocks = []
+        columns = {}
+
+        for direction, flights in (("arrival", await analyser.fetch_arrival(interval, tz)), ("departure", await analyser.fetch_departure(interval, tz))):
+            # the lists are sorted by actual time already, keep that order in the columns
+            width = max([len(flight.airports) for flight in flights], default=1)
+            codes = max([len(flight.flight_code) for flight in flights], default=1)
+            values = {
+                "est_time": [flight.est_minutes for flight in flights],
+                "act_time": [flight.act_minutes for flight in flights],
+                "airports": [flight.airports + [""] * (width - len(flight.airports)) for flight in flights],
+                "flight_numbers": [[fc.flight_number for fc in flight.flight_code] + [""] * (codes - len(flight.flight_code)) for flight in flights],
+                "airlines": [[fc.airline for fc in flight.flight_code] + [""] * (codes - len(flight.flight_code)) for flight in flights],
+            }
+
+            columns[direction] = {}
+            for name, (kind, _) in cls.layout.items():
+                source = np.array(values[name], dtype=kind)
+                if source.size == 0:
+                    source = source.reshape((0, 1) if cls.layout[name][1] else (0,))
+                block = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+                blocks.append(block)
+
+                array = np.ndarray(source.shape, dtype=source.dtype, buffer=block.buf)
+                array[...] = source
+                columns[direction][name] = array
+                catalogue[direction][name] = {"name": block.name, "dtype": source.dtype.str, "shape": source.shape}
+
+        return cls(catalogue, blocks, columns, owner=True)
+
+    @classmethod
+    def attach(cls, catalogue: dict):
+        """
+            Attaches to the shared memory described by `catalogue` without copying any data
+        """
+        from multiprocessing import shared_memory
+        import numpy as np
+
+        blocks = []
+        columns = {}
+        for direction in ("arrival", "departure"):
+            columns[direction] = {}
+            for name, spec in catalogue[direction].items():
+                block = cls.attach_block(shared_memory, spec["name"])
+                blocks.append(block)
+                array = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+                array.flags.writeable = False
+                columns[direction][name] = array
+
+        return cls(catalogue, blocks, columns, owner=False)
+
+    @staticmethod
+    def attach_block(shared_memory, name: str):
+        """
+            Opens a block without registering it with this process's resource tracker.
+            A process started outside multiprocessing has its own tracker, which would unlink
+            the block when the process exits although the owner still uses it.
+        """
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+
+        # before 3.13 the constructor always registers, so skip that call while attaching
+        # (unregistering afterwards would also drop the owner's registration when the tracker is shared)
+        from multiprocessing import resource_tracker
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+    def select(self, arrival: bool, lower_bound: datetime, upper_bound: datetime, bounded: bool = True) -> FlightView:
+        """
+            Returns the flights with estimated date in [lower_bound.date(), upper_bound.date()]
+            and, if bounded, actual time in [lower_bound, upper_bound]
+        """
+        import numpy as np
+
+        if lower_bound.date() < self.first_day or upper_bound.date() > self.last_day:
+            raise ValueError(f"Shared data only covers {self.first_day} to {self.last_day}")
+
+        columns = self.direction_columns(arrival)
+        offset = self.catalogue["utc_offset"]
+        epoch = date(1970, 1, 1)
+
+        # compare whole minutes, same as comparing the datetimes since all times lie on a minute
+        est_day = (columns["est_time"] + offset) // 1440
+        mask = (est_day >= (lower_bound.date() - epoch).days) & (est_day <= (upper_bound.date() - epoch).days)
+        if bounded:
+            lower = -(-int(lower_bound.timestamp()) // 60)
+            upper = int(upper_bound.timestamp()) // 60
+            mask &= (columns["act_time"] >= lower) & (columns["act_time"] <= upper)
+
+        return FlightView(self, np.flatnonzero(mask), arrival, offset)
+
+    def direction_columns(self, arrival: bool) -> dict:
+        if self.columns is None:
+            raise ValueError("Shared flight data is already closed")
+        return self.columns["arrival" if arrival else "departure"]
+
+    def close(self):
+        # drop the arrays before unmapping, so later reads raise instead of touching freed memory
+        self.columns = None
+        for block in self.blocks:
+            block.close()
+
+    def unlink(self):
+        """
+            Frees the shared memory, only the process which loaded the data should call this
+        """
+        self.close()
+        if self.owner:
+            for block in self.blocks:
+                block.unlink()
+
+def run_solver(catalogue: dict, question, solver: str = "solver", figure: str | None = None, **kwargs):
+    """
+        Runs `question(loop).solver(**kwargs)` on the shared flight data, meant to be the target of a worker process.
+        Example:
+        ```py
+        data = await SharedFlightData.load(FlightAnalyser(loop), 90)
+        with ProcessPoolExecutor() as pool:
+            pool.submit(run_solver, data.catalogue, Question1, "solver1", interval=30)
+        ```
+
+        Parameters
+        ----------
+        catalogue: dict
+            SharedFlightData.catalogue of the loaded data
+        question: type
+            The QuestionX class to run
+        solver: str
+            Name of the solver method
+        figure: str | None
+            If given, the current figure is saved to this path after the solver finishes
+    """
+    import asyncio
+
+    async def runner(loop):
+        fa = question(loop)
+        fa.attach_dataset(catalogue)
+        try:
+            res = await getattr(fa, solver)(**kwargs)
+            if figure is not None:
+                import matplotlib.pyplot as plt
+                plt.savefig(figure)
+                plt.close()
+            return res
+        finally:
+            fa.dataset.close()
+            await fa.finish()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(runner(loop))
+    finally:
+        loop.close()
+
+class FlightSample:
+    """
+        Stratified sample of flights drawn by FlightAnalyser.sample_flights.
+        Each flight carries a weight (the number of flights it stands for), so weighted sums estimate totals
+        and weighted means estimate means of all the flights.
+    """
+    flights: list[Flight]
+    weights: list[float]
+    strata: list[int] # stratum (day and hour) of each flight
+    days: list[int] # day of each flight, numbered in reading order
+    days_read: int
+    days_total: int
+    exact: bool # True if every flight was taken, then the estimates are the exact answers
+
+    def __init__(self, flights, weights, strata, days, days_read, days_total, exact):
+        self.flights = flights
+        self.weights = weights
+        self.strata = strata
+        self.days = days
+        self.days_read = days_read
+        self.days_total = days_total
+        self.exact = exact
+
+    def bootstrap(self, statistic, *columns, rounds: int = 200, confidence: float = 0.95, seed=None):
+        """
+            Returns the estimate and the bootstrap confidence interval of statistic(weights, *columns).
+            Flights are resampled within their own stratum. While only some of the days are read, the
+            days are resampled as well (each resampled day multiplies the weights of its flights), since
+            the unread days are estimated from the read ones.
+            statistic gets 2D arrays with one resample per row, so it should reduce over axis 1,
+            e.g. `lambda w, x: (w * x).sum(1) / w.sum(1)`.
+        """
+        import numpy as np
+
+        weights = np.asarray(self.weights, dtype=float)
+        columns = [np.asarray(column, dtype=float) for column in columns]
+        estimate = float(statistic(weights[None, :], *[column[None, :] for column in columns])[0])
+        if self.exact or len(weights) == 0:
+            return estimate, estimate, estimate
+
+        # resample indices within each stratum: start of the stratum + random offset inside it
+        order = np.argsort(self.strata, kind="stable")
+        strata = np.asarray(self.strata)[order]
+        _, start, size = np.unique(strata, return_index=True, return_counts=True)
+        start = np.repeat(start, size)
+        size = np.repeat(size, size)
+        rng = np.random.default_rng(seed)
+        idx = order[start + (rng.random((rounds, len(order))) * size).astype(int)]
+        resampled = weights[idx]
+
+        if self.days_read < self.days_total:
+            # between-day level: draw days_read days with replacement, a day drawn twice counts twice
+            days = np.asarray(self.days)
+            picks = rng.multinomial(self.days_read, [1 / self.days_read] * self.days_read, size=rounds)
+            resampled = resampled * picks[np.arange(rounds)[:, None], days[idx]]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = statistic(resampled, *[column[idx] for column in columns])
+        if np.isnan(values).all():
+            return estimate, float("nan"), float("nan")
+        alpha = (1 - confidence) / 2
+        return estimate, float(np.nanquantile(values, alpha)), float(np.nanquantile(values, 1 - alpha))
+
+class DailyAggregates:
+    """
+        Per-day count, sum of delays, sum of squared delays and delay histogram, stored as prefix sums,
+        so the statistics of any range of days are found in O(1) and a rolling series in O(days).
+    """
+    first_day: date
+    edges: list[int] # histogram bucket edges in minutes, delays outside go to the first / last bucket
+
+    def __init__(self, flights, first_day: date, last_day: date, edges=None):
+        import numpy as np
+
+        self.first_day = first_day
+        self.edges = list(range(-120, 601)) if edges is None else list(edges)
+        days = (last_day - first_day).days + 1
+        epoch = (first_day - date(1970, 1, 1)).days
+
+        # group by the estimated date, same as the day files
+        day = np.array([(flight.est_minutes + flight.utc_offset) // 1440 - epoch for flight in flights], dtype=int)
+        delay = np.array([flight.delay_minutes for flight in flights], dtype=float)
+        keep = (day >= 0) & (day < days)
+        day, delay = day[keep], delay[keep]
+
+        count = np.bincount(day, minlength=days).astype(float)
+        total = np.bincount(day, weights=delay, minlength=days)
+        squares = np.bincount(day, weights=delay * delay, minlength=days)
+        buckets = len(self.edges) + 1
+        cell = day * buckets + np.searchsorted(self.edges, delay, side="right")
+        hist = np.bincount(cell, minlength=days * buckets).reshape(days, buckets).astype(float)
+
+        # prefix[i] is the sum of the first i days
+        self.count = np.concatenate(([0], np.cumsum(count)))
+        self.total = np.concatenate(([0], np.cumsum(total)))
+        self.squares = np.concatenate(([0], np.cumsum(squares)))
+        self.hist = np.concatenate((np.zeros((1, hist.shape[1])), np.cumsum(hist, axis=0)))
+
+    def __len__(self):
+        return len(self.count) - 1
+
+    def day(self, idx: int) -> date:
+        return self.first_day + timedelta(days=idx)
+
+    def index(self, day: date) -> int:
+        return (day - self.first_day).days
+
+    def percentiles(self, hist, q):
+        """
+            Approximates the q-th percentiles from bucket counts by the lower edge of the bucket they fall in.
+            With the default one-minute buckets this is exact for delays between the first and last edge.
+        """
+        import numpy as np
+
+        # bucket i covers [edges[i - 1], edges[i]), the outer buckets are clamped to the first / last edge
+        lower = np.array([self.edges[0]] + self.edges, dtype=float)
+        cum = np.cumsum(hist, axis=-1)
+        res = []
+        for p in q:
+            bucket = np.argmax(cum >= cum[..., -1:] * p / 100, axis=-1)
+            res.append(np.where(cum[..., -1] > 0, lower[bucket], np.nan))
+        return res
+
+    def clamp(self, start: int, end: int) -> tuple[int, int]:
+        """
+            Clamps the day indices start and end to [0, len(self)]
+        """
+        return min(max(start, 0), len(self)), min(max(end, 0), len(self))
+
+    def window(self, start: int, end: int) -> dict:
+        """
+            Statistics of days start to end - 1 (indices from first_day), days outside the data are left out.
+            The statistics are NaN (and the count 0) if no day is left.
+        """
+        start, end = self.clamp(start, end)
+        if start >= end:
+            return {"Count": 0.0, "Mean": float("nan"), "S.D.": float("nan"), "Median": float("nan"), "P90": float("nan")}
+        stats = self.rolling_arrays(end - start, start, end)
+        return {name: float(values[0]) for name, values in stats.items()}
+
+    def rolling_arrays(self, size: int, start: int, end: int) -> dict:
+        """
+            Statistics of the windows [i - size, i) for every i in [start + size, end],
+            start and end are clamped to the data first, so the arrays are empty if no window fits
+        """
+        import numpy as np
+
+        start, end = self.clamp(start, end)
+        hi = np.arange(start + max(size, 1), end + 1)
+        lo = hi - size
+        count = self.count[hi] - self.count[lo]
+        total = self.total[hi] - self.total[lo]
+        squares = self.squares[hi] - self.squares[lo]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            # sample s.d. like statistics.stdev
+            sd = np.sqrt(np.maximum(squares - count * mean * mean, 0) / (count - 1))
+        p50, p90 = self.percentiles(self.hist[hi] - self.hist[lo], (50, 90))
+        return {"Count": count, "Mean": mean, "S.D.": sd, "Median": p50, "P90": p90}
+
+    def rolling(self, size: int):
+        """
+            Returns a table of the statistics of the `size` days ending at each day
+        """
+        import pandas as pd
+
+        stats = self.rolling_arrays(size, 0, len(self))
+        return pd.DataFrame({"Date": [self.day(i - 1) for i in range(size, len(self) + 1)]} | stats)
+
+    def periods(self, periods: list[tuple[date, date]]):
+        """
+            Returns a table comparing the statistics of several periods, each given as (first day, last day)
+        """
+        import pandas as pd
+
+        rows = []
+        for first, last in periods:
+            start, end = self.clamp(self.index(first), self.index(last) + 1)
+            # label with the days really covered, a period may be cut by the ends of the data
+            label = f"{self.day(start)} to {self.day(end - 1)}" if start < end else f"{first} to {last} (no data)"
+            rows.append({"Period": label} | self.window(start, end))
+        # keep the columns even without any period
+        return pd.DataFrame(rows, columns=["Period", "Count", "Mean", "S.D.", "Median", "P90"])
+
+class ResultCache:
+    """
+        On-disk cache of solver outputs (return value, printed text, figure and optionally a PNG).
+
+        A call is identified by the solver, the source of this module and its arguments. Its manifest lists the
+        content hash of every day file it read and the version of the airport info it used, and the
+        result is stored under the hash of all of these. A call is only reused while none of the files
+        it depends on changed. The least recently used results are removed above max_bytes.
+
+        The airport info is saved with the cache, so a hit needs no download. The saved copy is only
+        trusted for airport_max_age seconds, after that the results using it are recomputed with freshly
+        downloaded info.
+    """
+    path: str
+    max_bytes: int
+    png: bool # also keep a rendered PNG of the figure
+    airport_max_age: float | None # None keeps the saved airport info until refresh_airport_info
+
+    def __init__(self, path: str = ".solver_cache", max_bytes: int = 512 * 1024 * 1024, png: bool = False, airport_max_age: float | None = 7 * 24 * 3600):
+        import os
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.png = png
+        self.airport_max_age = airport_max_age
+        for folder in ("calls", "results"):
+            os.makedirs(os.path.join(path, folder), exist_ok=True)
+        self.hashes = self.read_json("hashes.json", {}) # file path -> [size, mtime, content hash]
+        self.hashes_changed = False
+
+    def read_json(self, name: str, default):
+        import os
+
+        try:
+            with open(os.path.join(self.path, name), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def write_json(self, name: str, data):
+        import os
+
+        # write then rename so a crash never leaves half a file
+        target = os.path.join(self.path, name)
+        with open(target + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(target + ".tmp", target)
+
+    def file_hash(self, path: str) -> str | None:
+        """
+            Content hash of a day file, only recomputed when its size or modification time changed
+        """
+        import hashlib
+        import os
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        known = self.hashes.get(path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.hashes[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.hashes_changed = True
+        return digest
+
+    def save_hashes(self):
+        if self.hashes_changed:
+            self.write_json("hashes.json", self.hashes)
+            self.hashes_changed = False
+
+    def airport_snapshot(self) -> dict | None:
+        """
+            Returns the version and download time of the saved airport info, or None if there is none or it expired
+        """
+        meta = self.read_json("airport_info.version.json", None)
+        if not isinstance(meta, dict):
+            return None
+        if self.airport_max_age is not None and datetime.now().timestamp() - meta["fetched"] > self.airport_max_age:
+            return None
+        return meta
+
+    def airport_version(self) -> str | None:
+        """
+            Version of the airport info a solver would use now, None if it would have to download it
+        """
+        if Fetcher.airport_info_version is not None:
+            return Fetcher.airport_info_version
+        meta = self.airport_snapshot()
+        return None if meta is None else meta["version"]
+
+    def load_airport_info(self):
+        """
+            Uses the saved airport info if nothing was downloaded in this run and it has not expired,
+            so cached and fresh results agree on it
+        """
+        if Fetcher.airport_info_cache is not None:
+            return
+        meta = self.airport_snapshot()
+        if meta is not None:
+            snapshot = self.read_json("airport_info.json", None)
+            if snapshot is not None:
+                Fetcher.set_airport_info(snapshot, meta["fetched"])
+
+    def save_airport_info(self):
+        meta = {"version": Fetcher.airport_info_version, "fetched": Fetcher.airport_info_fetched}
+        # a new download of the same info is saved too, it restarts the expiry
+        if Fetcher.airport_info_cache is not None and self.read_json("airport_info.version.json", None) != meta:
+            self.write_json("airport_info.json", Fetcher.airport_info_cache)
+            self.write_json("airport_info.version.json", meta)
+
+    def refresh_airport_info(self):
+        """
+            Drops the saved and the loaded airport info, so the next solver using it downloads it again
+            and the results depending on the old info are recomputed
+        """
+        import os
+
+        for name in ("airport_info.json", "airport_info.version.json"):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+        Fetcher.set_airport_info(None)
+
+    def result_key(self, call: str, files: dict, airport: str | None) -> str:
+        import hashlib
+
+        return hashlib.sha256(json.dumps([call, sorted(files.items()), airport]).encode()).hexdigest()
+
+    def get(self, call: str):
+        """
+            Returns (result key, stored output) of a call, or None if it is missing or outdated
+        """
+        import os
+        import pickle
+
+        manifest = self.read_json(os.path.join("calls", f"{call}.json"), None)
+        if manifest is None:
+            return None
+        outdated = any(self.file_hash(path) != digest for path, digest in manifest["files"].items())
+        self.save_hashes()
+        if outdated:
+            return None
+        if manifest["airport"] is not None and self.airport_version() != manifest["airport"]:
+            return None
+
+        key = self.result_key(call, manifest["files"], manifest["airport"])
+        target = os.path.join(self.path, "results", f"{key}.pkl")
+        try:
+            with open(target, "rb") as f:
+                output = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # the modification time is the last use, for the LRU eviction
+        os.utime(target)
+        return key, output
+
+    def put(self, call: str, files: list[str], airport: str | None, output: dict) -> str:
+        import os
+        import pickle
+
+        files = {path: self.file_hash(path) for path in files}
+        self.save_hashes()
+        key = self.result_key(call, files, airport)
+        target = os.path.join(self.path, "results", f"{key}.pkl")
+        with open(target + ".tmp", "wb") as f:
+            pickle.dump(output, f)
+        os.replace(target + ".tmp", target)
+        self.write_json(os.path.join("calls", f"{call}.json"), {"files": files, "airport": airport})
+
+        self.evict()
+        return key
+
+    def evict(self):
+        """
+            Removes the least recently used results (with their PNG) until the cache fits in max_bytes,
+            then the manifests of calls whose result is gone
+        """
+        import os
+
+        folder = os.path.join(self.path, "results")
+        entries = {} # result key -> [last use, size, file names]
+        for name in os.listdir(folder):
+            stat = os.stat(os.path.join(folder, name))
+            entry = entries.setdefault(name.split(".")[0], [0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime_ns)
+            entry[1] += stat.st_size
+            entry[2].append(name)
+        total = sum(size for _, size, _ in entries.values())
+        removed = False
+        for _, size, names in sorted(entries.values()):
+            if total <= self.max_bytes:
+                break
+            for name in names:
+                os.remove(os.path.join(folder, name))
+            total -= size
+            removed = True
+        if not removed:
+            return
+
+        calls = os.path.join(self.path, "calls")
+        for name in os.listdir(calls):
+            manifest = self.read_json(os.path.join("calls", name), None)
+            key = None if manifest is None else self.result_key(name[:-len(".json")], manifest["files"], manifest["airport"])
+            if key is None or not os.path.exists(os.path.join(folder, f"{key}.pkl")):
+                os.remove(os.path.join(calls, name))
+
+def cached_solver(solver):
+    """
+        Decorator for QuestionX solvers, answers from FlightAnalyser.result_cache when it is enabled.
+        Only static mode is cached, dynamic data changes all the time.
+    """
+    import functools
+    import hashlib
+    import inspect
+
+    signature = inspect.signature(solver)
+    try:
+        # a changed solver should not reuse old outputs, neither should a change of the helpers producing
+        # its data (fetching, parsing, aggregates, turnarounds), so the whole module is hashed
+        with open(inspect.getsourcefile(solver), "rb") as f:
+            source = hashlib.sha256(f.read()).hexdigest()
+    except (OSError, TypeError):
+        source = solver.__qualname__
+
+    @functools.wraps(solver)
+    async def wrapper(self, *args, **kwargs):
+        import contextlib
+        import io
+        import pickle
+
+        cache = self.result_cache
+        if cache is None or self.client.mode != "static":
+            return await solver(self, *args, **kwargs)
+
+        import matplotlib.pyplot as plt
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name != "self"}
+        call = hashlib.sha256(json.dumps(
+            [type(self).__qualname__, solver.__name__, source, self.fixed_date.isoformat(), arguments],
+            sort_keys=True, default=repr
+        ).encode()).hexdigest()
+
+        cache.load_airport_info()
+        # a stored figure only holds what the solver drew, it can stand in for an empty figure but
+        # cannot be merged into one the caller already drew on, so those calls run the solver
+        empty = figure_empty(plt)
+        hit = cache.get(call)
+        if hit is not None and (empty or hit[1]["figure"] is None):
+            key, output = hit
+            print(output["stdout"], end="")
+            if output["figure"] is not None:
+                blank = plt.gcf().number if plt.get_fignums() else None
+                # unpickling puts the figure back into pyplot, it takes the place of the blank one
+                figure = pickle.loads(output["figure"])
+                if blank is not None:
+                    plt.close(blank)
+                plt.figure(figure.number)
+            self.last_png = cache_png(cache, key, output)
+            return output["result"]
+
+        # run the solver, keeping what it prints and draws
+        self.client.touched = set()
+        self.client.airport_info_used = False
+
+        stdout = sys.stdout
+        class Tee(io.StringIO):
+            def write(self, text):
+                stdout.write(text)
+                return super().write(text)
+
+        before = figure_state(plt)
+        buffer = Tee()
+        with contextlib.redirect_stdout(buffer):
+            res = await solver(self, *args, **kwargs)
+
+        figure = None
+        if figure_state(plt) not in (None, before):
+            if not empty:
+                # the figure mixes the caller's drawing with the solver's, it cannot be stored alone
+                self.last_png = None
+                return res
+            try:
+                figure = pickle.dumps(plt.gcf())
+            except Exception:
+                # the figure cannot be stored, so the output cannot be replayed either
+                self.last_png = None
+                return res
+
+        output = {"result": res, "stdout": buffer.getvalue(), "figure": figure, "png": None}
+        if cache.png and figure is not None:
+            png = io.BytesIO()
+            plt.gcf().savefig(png, format="png")
+            output["png"] = png.getvalue()
+
+        airport = None
+        if self.client.airport_info_used:
+            cache.save_airport_info()
+            airport = Fetcher.airport_info_version
+        key = cache.put(call, sorted(self.client.touched), airport, output)
+        self.last_png = cache_png(cache, key, output)
+        return res
+
+    return wrapper
+
+def figure_state(plt):
+    """
+        Returns something that changes when anything is drawn on the current figure
+    """
+    if not plt.get_fignums():
+        return None
+    figure = plt.gcf()
+    return figure.number, tuple(len(ax.get_children()) for ax in figure.axes)
+
+def figure_empty(plt) -> bool:
+    """
+        Returns True if there is no current figure or nothing is drawn on it
+    """
+    if not plt.get_fignums():
+        return True
+    figure = plt.gcf()
+    return not figure.texts and not any(ax.has_data() or ax.get_title() or ax.get_legend() is not None for ax in figure.axes)
+
+def cache_png(cache: ResultCache, key: str, output: dict) -> str | None:
+    """
+        Writes the PNG of a cached output next to it and returns the path
+    """
+    import os
+
+    if output["png"] is None:
+        return None
+    target = os.path.join(cache.path, "results", f"{key}.png")
+    if not os.path.exists(target):
+        with open(target, "wb") as f:
+            f.write(output["png"])
+    return target
 
 class FlightAnalyser:
     interval: int # The interval to be checked
     timezone: int # offset from utc
     client: Fetcher
+    dataset: SharedFlightData | None = None # flights loaded once, shared between processes
+    result_cache: ResultCache | None = None # on-disk cache of solver outputs, see enable_cache
+    last_png: str | None = None # PNG of the last cached solver output, if the cache keeps them
     fixed_date: datetime = datetime(2023, 11, 14, 23, 59, 59, 0, timezone(timedelta(hours=8)))
 
     def __init__(self, loop, mode: Literal["static", "dynamic"] = "static"):
         self.client = Fetcher(loop, mode)
 
+    def enable_cache(self, path: str = ".solver_cache", max_bytes: int = 512 * 1024 * 1024, png: bool = False, airport_max_age: float | None = 7 * 24 * 3600):
+        """
+            Keeps the solver outputs on disk, so a rerun with the same parameters and day files is instant
+        """
+        self.result_cache = ResultCache(path, max_bytes, png, airport_max_age)
+
+    def attach_dataset(self, catalogue: dict):
+        """
+            Makes fetch_arrival / fetch_departure read from shared data instead of the day files
+        """
+        self.dataset = SharedFlightData.attach(catalogue)
+
     def correct_data(self, delays, constant):
         """
             Correct the data by removing absoulted values larger than constant * s.d.
@@ -179,6 +1089,11 @@ class FlightAnalyser:
         today = self.fixed_date if self.client.mode == "static" else datetime.now(timezone(timedelta(hours=tz)))
         lower_bound = today - timedelta(days=interval)
         upper_bound = today
+        if self.dataset is not None:
+            # already parsed and sorted in shared memory
+            self.client.touched.update(self.client.static_path("arrival", lower_bound.date() + timedelta(days=i)) for i in range(interval + 1))
+            return self.dataset.select(True, lower_bound, upper_bound)
+
         for curr_date in [lower_bound.date() + timedelta(days=i) for i in range(interval + 1)]:
             # obtain data from api
             data = await self.client.fetch_arrival(curr_date)
@@ -213,7 +1128,7 @@ class FlightAnalyser:
                         # determine if the time actually lies on the interval we are searching
                         if lower_bound <= act_time and act_time <= upper_bound:
                             # add to the entry
-                            flights.add(Flight(True, est_time.isoformat(), act_time.isoformat(), group["origin"], group["flight"]))
+                            flights.add(Flight.from_minutes(True, int(est_time.timestamp()) // 60, int(act_time.timestamp()) // 60, group["origin"], group["flight"]))
             
         # sort the flights in actual arrival time chornological order 
         flights = sorted(list(flights))
@@ -230,6 +1145,10 @@ class FlightAnalyser:
         today = self.fixed_date if self.client.mode == "static" else datetime.now(timezone(timedelta(hours=tz)))
         lower_bound = today - timedelta(days=interval)
         upper_bound = today
+        if self.dataset is not None:
+            self.client.touched.update(self.client.static_path("departure", lower_bound.date() + timedelta(days=i)) for i in range(interval + 1))
+            return self.dataset.select(False, lower_bound, upper_bound, bounded=self.client.mode != "static")
+
         for curr_date in [lower_bound.date() + timedelta(days=i) for i in range(interval + 1)]:
             # obtain data from api
             data = await self.client.fetch_departure(curr_date)
@@ -257,11 +1176,201 @@ class FlightAnalyser:
                             
                         if (lower_bound <= act_time and act_time <= upper_bound) or self.client.mode == "static": # ignore date bounding when in static mode
                             # add to the entry
-                            flights.add(Flight(False, est_time.isoformat(), act_time.isoformat(), group["destination"], group["flight"]))
+                            flights.add(Flight.from_minutes(False, int(est_time.timestamp()) // 60, int(act_time.timestamp()) // 60, group["destination"], group["flight"]))
             
         flights = sorted(list(flights))
         return flights
-    
+
+    def parse_group(self, curr_date: date, group: dict, arrival: bool) -> Flight:
+        """
+            Turns one record of a day file into a Flight, same as the loops in fetch_arrival / fetch_departure
+        """
+        est_time = datetime.fromisoformat(f"{curr_date}T{group['time']}:00+08:00")
+        status_code = group["status"].split()
+        time = status_code[2] if arrival else status_code[1]
+        if len(status_code) == (4 if arrival else 3):
+            temp_date = list(map(int, status_code[-1][1:-1].split('/')))
+            act_time = datetime.fromisoformat(f"{date(temp_date[2], temp_date[1], temp_date[0])}T{time}:00+08:00")
+        else:
+            act_time = datetime.fromisoformat(f"{curr_date}T{time}:00+08:00")
+        return Flight.from_minutes(arrival, int(est_time.timestamp()) // 60, int(act_time.timestamp()) // 60, group["origin" if arrival else "destination"], group["flight"])
+
+    async def sample_flights(self, interval: int, arrival: bool = True, per_stratum: int = 4, refine: bool = False, batch_days: int = 10, seed=None, day_fraction: float = 0.2):
+        """
+            Draws a stratified sample straight from the day files and yields FlightSample objects.
+            Only a random day_fraction of the days is read. Each day and hour of the estimated time is a
+            stratum, its records are shuffled and the first per_stratum of them are taken, so only those
+            are parsed into flights.
+
+            Without refine, one sample is yielded. With refine, batch_days more days are read between
+            samples until all days are read, then the strata are taken 4 times deeper each time until every
+            flight is taken, and the last sample is exact. Every file is read once and every record parsed
+            at most once, the larger samples extend the smaller ones.
+
+            The preview works on whole days, i.e. the `interval` days before fixed_date.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            per_stratum: int
+                The number of flights sampled from each day and hour.
+            refine: bool
+                Keep reading and yield better samples until the answer is exact.
+            batch_days: int
+                The number of days read between two samples when refining.
+            seed:
+                Seed of the random generator.
+            day_fraction: float
+                The share of the days read for the first sample, at least 2 days are read.
+        """
+        from math import ceil
+        import random
+
+        rng = random.Random(seed)
+        today = self.fixed_date if self.client.mode == "static" else datetime.now(timezone(timedelta(hours=8)))
+        days = [today.date() - timedelta(days=i) for i in range(interval)]
+        rng.shuffle(days)
+        status = "At gate " if arrival else "Dep "
+
+        records = {} # (day, hour) -> shuffled records of the stratum
+        parsed = {} # (day, hour) -> flights parsed so far, from the start of records
+        read = 0
+        target = min(len(days), max(2, ceil(len(days) * day_fraction)))
+        while True:
+            while read < target:
+                curr_date = days[read]
+                data = await (self.client.fetch_arrival(curr_date) if arrival else self.client.fetch_departure(curr_date))
+                new = {}
+                for datum in data:
+                    if datum["date"] != curr_date.isoformat():
+                        continue
+                    for group in datum["list"]:
+                        # no parsing until the record is known to be taken
+                        if group["status"].startswith(status):
+                            new.setdefault((curr_date, group["time"][:2]), []).append(group)
+                for stratum, groups in new.items():
+                    rng.shuffle(groups)
+                    records[stratum] = groups
+                    parsed[stratum] = []
+                read += 1
+
+            flights, weights, strata, day_ids = [], [], [], []
+            day_index = {curr_date: idx for idx, curr_date in enumerate(days[:read])}
+            exact = read == len(days)
+            for idx, (stratum, groups) in enumerate(records.items()):
+                taken = parsed[stratum]
+                while len(taken) < min(per_stratum, len(groups)):
+                    taken.append(self.parse_group(stratum[0], groups[len(taken)], arrival))
+                exact = exact and len(taken) == len(groups)
+
+                # each sampled flight stands for the unsampled ones of its stratum and of the unread days
+                weight = len(groups) / len(taken) * len(days) / read
+                flights.extend(taken)
+                weights.extend([weight] * len(taken))
+                strata.extend([idx] * len(taken))
+                day_ids.extend([day_index[stratum[0]]] * len(taken))
+            yield FlightSample(flights, weights, strata, day_ids, read, len(days), exact)
+
+            if not refine or exact:
+                return
+            if read < len(days):
+                target = min(len(days), read + batch_days)
+            else:
+                per_stratum *= 4
+
+    async def link_turnarounds(self, interval: int, key: Literal["route", "flight", "airline"] = "route", min_ground: int = 30, max_ground: int = 18 * 60):
+        """
+            Pairs each arrival with the departure which most likely used the same aircraft.
+            Departures are put into a hash table by the join key, then every arrival takes the earliest
+            unused departure with the same key that leaves between min_ground and max_ground minutes after it.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            key: str
+                "route" matches the operating airline and an airport (the aircraft flies back to where it came from),
+                "flight" matches any of the flight numbers including code-share ones,
+                "airline" only matches the operating airline.
+            min_ground: int
+                Minimum ground time in minutes.
+            max_ground: int
+                Maximum ground time in minutes, turns over midnight are fine since the times are absolute.
+        """
+        from bisect import bisect_left
+        import pandas as pd
+
+        arrivals = await self.fetch_arrival(interval)
+        departures = await self.fetch_departure(interval)
+
+        def join_keys(flight):
+            # the first flight code is the operating one, the others are code-share aliases
+            airline = flight.flight_code[0].airline
+            if key == "flight":
+                return {fc.flight_number for fc in flight.flight_code}
+            elif key == "airline":
+                return {airline}
+            else:
+                return {(airline, airport) for airport in flight.airports}
+
+        def order(flight):
+            # break ties on actual time so the greedy matching does not depend on set order
+            return flight.act_minutes, flight.est_minutes, flight.flight_code[0].flight_number
+
+        # build side: key -> departures in actual time order
+        table = {}
+        for flight in sorted(departures, key=order):
+            for k in join_keys(flight):
+                table.setdefault(k, []).append(flight)
+        times = {k: [flight.act_minutes for flight in candidates] for k, candidates in table.items()}
+
+        # probe side
+        used = set()
+        rows = []
+        for inbound in sorted(arrivals, key=order):
+            best = None
+            for k in join_keys(inbound):
+                if k not in table:
+                    continue
+                candidates = table[k]
+                idx = bisect_left(times[k], inbound.act_minutes + min_ground)
+                while idx < len(candidates) and times[k][idx] <= inbound.act_minutes + max_ground:
+                    if id(candidates[idx]) not in used:
+                        if best is None or candidates[idx].act_minutes < best.act_minutes:
+                            best = candidates[idx]
+                        break
+                    idx += 1
+
+            if best is None:
+                continue
+            used.add(id(best))
+            rows.append({
+                "Inbound": inbound.flight_code[0].flight_number,
+                "Outbound": best.flight_code[0].flight_number,
+                "Origin": '-'.join(inbound.airports),
+                "Destination": '-'.join(best.airports),
+                "Inbound Time": inbound.act_time,
+                "Outbound Time": best.act_time,
+                "Inbound Delay": inbound.delay_minutes,
+                "Outbound Delay": best.delay_minutes,
+                "Ground Time": best.act_minutes - inbound.act_minutes,
+            })
+
+        return pd.DataFrame(rows, columns=["Inbound", "Outbound", "Origin", "Destination", "Inbound Time", "Outbound Time", "Inbound Delay", "Outbound Delay", "Ground Time"])
+
+    async def daily_aggregates(self, interval: int, arrival: bool = True) -> DailyAggregates:
+        """
+            Fetches the flights once and returns their per-day aggregates
+        """
+        today = self.fixed_date if self.client.mode == "static" else datetime.now(timezone(timedelta(hours=8)))
+        flights = await self.fetch_arrival(interval) if arrival else await self.fetch_departure(interval)
+        # the day of the lower bound is only partly fetched (arrivals from its last second on), leave it out
+        # so the first day is as full as the others, in both directions
+        return DailyAggregates(flights, (today - timedelta(days=interval)).date() + timedelta(days=1), today.date())
+
     async def finish(self):
         await self.client.close()
 
@@ -269,6 +1378,7 @@ class Question1(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
             
+    @cached_solver
     async def solver1(self, interval: int = 90, arrival: bool = True):
         """
             Problem: What are the statistics of delays of the flights for the last 90 days?
@@ -287,7 +1397,7 @@ class Question1(FlightAnalyser):
         flights = await self.fetch_arrival(interval) if arrival else await self.fetch_departure(interval)
 
         # calculate the delays of the flights in minutes
-        delays = [int((datetime.fromisoformat(flight.act_time) - datetime.fromisoformat(flight.est_time)).total_seconds() // 60) for flight in flights]
+        delays = [flight.delay_minutes for flight in flights]
 
         print(f"\rStatistics for Delays of {'Arrival' if arrival else 'Departure'} Flights")
 
@@ -299,7 +1409,9 @@ class Question1(FlightAnalyser):
         )
 
         print(df)
+        return df
         
+    @cached_solver
     async def solver2(self, interval: int = 90, arrival: bool = True):
         """
             Problem: Output the diagram of the data.
@@ -317,7 +1429,7 @@ class Question1(FlightAnalyser):
         flights = await self.fetch_arrival(interval) if arrival else await self.fetch_departure(interval)
 
         # calculate the delays of the flights in minutes
-        delays = [int((datetime.fromisoformat(flight.act_time) - datetime.fromisoformat(flight.est_time)).total_seconds() // 60) for flight in flights]
+        delays = [flight.delay_minutes for flight in flights]
 
         counter = {}
         for idx in range(min(delays), max(delays) + 1):
@@ -332,6 +1444,7 @@ class Question1(FlightAnalyser):
         plt.xlabel("Delay (in minutes)")
         plt.ylabel("Count")
 
+    @cached_solver
     async def solver3(self, interval: int = 90, arrival: bool = True, bin_size: int = 5):
         """
             What if the data are binned?
@@ -349,7 +1462,7 @@ class Question1(FlightAnalyser):
         flights = await self.fetch_arrival(interval) if arrival else await self.fetch_departure(interval)
 
         # calculate the delays of the flights in minutes
-        delays = [int((datetime.fromisoformat(flight.act_time) - datetime.fromisoformat(flight.est_time)).total_seconds() // 60) for flight in flights]
+        delays = [flight.delay_minutes for flight in flights]
 
         delays = self.correct_data(delays, 10)
         
@@ -363,10 +1476,66 @@ class Question1(FlightAnalyser):
         plt.xlabel("Delay (in minutes)")
         plt.ylabel("Count")
 
+    async def preview(self, interval: int = 90, arrival: bool = True, per_stratum: int = 4, refine: bool = False, rounds: int = 200, confidence: float = 0.95, seed=None, day_fraction: float = 0.2):
+        """
+            Problem: Approximate statistics of delays from a sample, with bootstrap confidence intervals.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            per_stratum: int
+                The number of flights sampled from each day and hour.
+            refine: bool
+                Print better estimates as more data is read, until the exact answer.
+            rounds: int
+                The number of bootstrap resamples.
+            confidence: float
+                The confidence level of the intervals.
+            day_fraction: float
+                The share of the days read for the first estimate.
+        """
+        import numpy as np
+        import pandas as pd
+
+        def mean(w, d):
+            return (w * d).sum(1) / w.sum(1)
+
+        def sd(w, d):
+            return np.sqrt((w * (d - mean(w, d)[:, None]) ** 2).sum(1) / w.sum(1))
+
+        def median(w, d):
+            order = np.argsort(d, axis=1)
+            d, w = np.take_along_axis(d, order, 1), np.take_along_axis(w, order, 1)
+            cum = np.cumsum(w, axis=1)
+            return d[np.arange(len(d)), np.argmax(cum >= cum[:, -1:] / 2, axis=1)]
+
+        df = None
+        async for sample in self.sample_flights(interval, arrival, per_stratum, refine, seed=seed, day_fraction=day_fraction):
+            delays = [flight.delay_minutes for flight in sample.flights]
+            rows = [sample.bootstrap(statistic, delays, rounds=rounds, confidence=confidence, seed=seed) for statistic in (mean, median, sd)]
+
+            df = pd.DataFrame(
+                {
+                    "Statistics": ["Mean", "Median", "S.D."],
+                    "Estimate": [row[0] for row in rows],
+                    "Lower": [row[1] for row in rows],
+                    "Upper": [row[2] for row in rows],
+                }
+            )
+
+            print(f"\rEstimated Statistics for Delays of {'Arrival' if arrival else 'Departure'} Flights ({sample.days_read}/{sample.days_total} days read, {len(sample.flights)} flights sampled{', exact' if sample.exact else ''})")
+            print(df)
+
+        return df
+
 class Question2(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
 
+    @cached_solver
     async def solver1(self, interval: int = 90, arrival: bool = True):
         """
             Problem: What are the common destination / origin of flights for the past 90 days?
@@ -466,6 +1635,7 @@ class Question2(FlightAnalyser):
         plt.colorbar(mpl.cm.ScalarMappable(cmap=cmap), ax=ax)
         plt.title(f"Common {'Origins' if arrival else 'Destinations'} of Flights {'from' if arrival else 'to'} Hong Kong")
 
+    @cached_solver
     async def solver2(self, interval: int = 90, arrival: bool = True):
         """
             Problem: What if we visualize the data in bar chart? We only visulalize top 10 destinations / origins.
@@ -504,6 +1674,7 @@ class Question2(FlightAnalyser):
         plt.xlabel("Country")
         plt.ylabel("Flight Count")
 
+    @cached_solver
     async def solver3(self, interval: int = 90, arrival: bool = True):
         """
             Problem: What if we group by continents?
@@ -548,10 +1719,70 @@ class Question2(FlightAnalyser):
         plt.xlabel("Country")
         plt.ylabel("Flight Count")
 
+    async def preview(self, interval: int = 90, arrival: bool = True, top: int = 10, per_stratum: int = 4, refine: bool = False, rounds: int = 200, confidence: float = 0.95, seed=None, day_fraction: float = 0.2):
+        """
+            Problem: Approximate the most common destinations / origins from a sample, with bootstrap confidence intervals.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            top: int
+                The number of countries shown.
+            per_stratum: int
+                The number of flights sampled from each day and hour.
+            refine: bool
+                Print better estimates as more data is read, until the exact answer.
+            rounds: int
+                The number of bootstrap resamples.
+            confidence: float
+                The confidence level of the intervals.
+            day_fraction: float
+                The share of the days read for the first estimate.
+        """
+        import pandas as pd
+
+        def total(w, c):
+            return (w * c).sum(1)
+
+        airport_info = await self.client.fetch_airport_info()
+
+        df = None
+        async for sample in self.sample_flights(interval, arrival, per_stratum, refine, seed=seed, day_fraction=day_fraction):
+            # estimated number of flights of each country
+            country_counter = {}
+            for flight, weight in zip(sample.flights, sample.weights):
+                for dest in flight.airports:
+                    country = airport_info[dest]["name"]
+                    country_counter[country] = country_counter.get(country, 0) + weight
+
+            countries = sorted(country_counter, key=lambda v: country_counter[v])[-top:][::-1]
+            rows = []
+            for country in countries:
+                counts = [sum(airport_info[dest]["name"] == country for dest in flight.airports) for flight in sample.flights]
+                rows.append(sample.bootstrap(total, counts, rounds=rounds, confidence=confidence, seed=seed))
+
+            df = pd.DataFrame(
+                {
+                    "Country": countries,
+                    "Estimate": [row[0] for row in rows],
+                    "Lower": [row[1] for row in rows],
+                    "Upper": [row[2] for row in rows],
+                }
+            )
+
+            print(f"\rEstimated Number of Flights {'from' if arrival else 'to'} Hong Kong Group by {'Origin' if arrival else 'Destination'} ({sample.days_read}/{sample.days_total} days read, {len(sample.flights)} flights sampled{', exact' if sample.exact else ''})")
+            print(df)
+
+        return df
+
 class Question3(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
 
+    @cached_solver
     async def solver(self, interval: int = 90, arrival: bool = True):
         import matplotlib.pyplot as plt
         import numpy as np
@@ -568,7 +1799,7 @@ class Question3(FlightAnalyser):
             target_airport = airport_info[flight.airports[0]]
             # Only consider the FIRST destination
             dist = self.calculate_distance(target_airport["coordinates"] if arrival else hkg["coordinates"], hkg["coordinates"] if arrival else target_airport["coordinates"])
-            delay = int((datetime.fromisoformat(flight.act_time) - datetime.fromisoformat(flight.est_time)).total_seconds() // 60)
+            delay = flight.delay_minutes
 
             if delay >= 300:
                 dists.append(dist)
@@ -586,6 +1817,7 @@ class Question4(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
 
+    @cached_solver
     async def solver(self, interval: int = 90, arrival: bool = True):
         import matplotlib.pyplot as plt
 
@@ -594,10 +1826,10 @@ class Question4(FlightAnalyser):
         times = []
         delays = []
         for flight in flights:
-            est_time = datetime.fromisoformat(flight.est_time)
+            est_time = flight.est_datetime
             clock = est_time.time()
             time_from_zero = clock.hour * 3600 + clock.minute * 60 + clock.second
-            delay = int((datetime.fromisoformat(flight.act_time) - datetime.fromisoformat(flight.est_time)).total_seconds() // 60)
+            delay = flight.delay_minutes
 
             times.append(time_from_zero)
             delays.append(delay)
@@ -605,11 +1837,67 @@ class Question4(FlightAnalyser):
         plt.scatter(times, delays)
         plt.xlabel("Estimated Arrival Time Away from 00:00 (in minutes)")
         plt.ylabel("Delays (in minutes)")
-        
+
+    async def preview(self, interval: int = 90, arrival: bool = True, per_stratum: int = 4, refine: bool = False, rounds: int = 200, confidence: float = 0.95, seed=None, day_fraction: float = 0.2):
+        """
+            Problem: Approximate the mean delay of each hour from a sample, with bootstrap confidence intervals.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            per_stratum: int
+                The number of flights sampled from each day and hour.
+            refine: bool
+                Print better estimates as more data is read, until the exact answer.
+            rounds: int
+                The number of bootstrap resamples.
+            confidence: float
+                The confidence level of the intervals.
+            day_fraction: float
+                The share of the days read for the first estimate.
+        """
+        import matplotlib.pyplot as plt
+        import numpy as np
+        import pandas as pd
+
+        def hourly_mean(hour):
+            def statistic(w, d, h):
+                # hours without flights give nan
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return (w * (h == hour) * d).sum(1) / (w * (h == hour)).sum(1)
+            return statistic
+
+        df = None
+        async for sample in self.sample_flights(interval, arrival, per_stratum, refine, seed=seed, day_fraction=day_fraction):
+            delays = [flight.delay_minutes for flight in sample.flights]
+            hours = [flight.est_datetime.hour for flight in sample.flights]
+            rows = [sample.bootstrap(hourly_mean(hour), delays, hours, rounds=rounds, confidence=confidence, seed=seed) for hour in range(24)]
+
+            df = pd.DataFrame(
+                {
+                    "Hour": list(range(24)),
+                    "Estimate": [row[0] for row in rows],
+                    "Lower": [row[1] for row in rows],
+                    "Upper": [row[2] for row in rows],
+                }
+            )
+
+            print(f"\rEstimated Mean Delay of Each Hour ({sample.days_read}/{sample.days_total} days read, {len(sample.flights)} flights sampled{', exact' if sample.exact else ''})")
+            print(df)
+
+        plt.errorbar(df["Hour"], df["Estimate"], yerr=[df["Estimate"] - df["Lower"], df["Upper"] - df["Estimate"]], fmt="o", capsize=3)
+        plt.xlabel(f"Estimated {'Arrival' if arrival else 'Departure'} Hour")
+        plt.ylabel("Mean Delay (in minutes)")
+        return df
+
 class Question5(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
 
+    @cached_solver
     async def solver(self, interval: int = 90, arrival: bool = True):
         import matplotlib.pyplot as plt
         import numpy as np
@@ -683,6 +1971,7 @@ class Question6(FlightAnalyser):
     def __init__(self, loop):
         super().__init__(loop)
 
+    @cached_solver
     async def solver1(self, interval: int = 90, arrival: bool = True):
         import matplotlib.pyplot as plt
 
@@ -691,7 +1980,7 @@ class Question6(FlightAnalyser):
         timeslots = [0] * 24 * 90
 
         for flight in flights:
-            est_time = datetime.fromisoformat(flight.est_time)
+            est_time = flight.est_datetime
 
             hour = est_time.hour
             day = interval - (self.fixed_date.date() - est_time.date()).days - 1
@@ -702,6 +1991,7 @@ class Question6(FlightAnalyser):
         plt.xlabel("Timeslot (Delta hour from 2023-08-17 00:00)")
         plt.ylabel("Flight Count")
 
+    @cached_solver
     async def solver2(self, interval: int = 90, arrival: bool = True):
         import matplotlib.pyplot as plt
         import numpy as np
@@ -711,7 +2001,7 @@ class Question6(FlightAnalyser):
         timeslots = [0] * 24 * interval
 
         for flight in flights:
-            est_time = datetime.fromisoformat(flight.act_time)
+            est_time = flight.act_datetime
 
             hour = est_time.hour
             day = interval - (self.fixed_date.date() - est_time.date()).days - 1
@@ -728,6 +2018,7 @@ class Question6(FlightAnalyser):
         plt.xlabel("Timeslot (Delta hour from 2023-08-17 00:00)")
         plt.ylabel("Flight Count")
 
+    @cached_solver
     async def solver3(self, interval: int = 90, arrival: bool = True, skip_date: str = "2023-08-17"):
         import matplotlib.pyplot as plt
         import numpy as np
@@ -739,10 +2030,10 @@ class Question6(FlightAnalyser):
 
         actual_data = [0] * 24
         for flight in flights:
-            est_time = datetime.fromisoformat(flight.act_time)
+            est_time = flight.act_datetime
             hour = est_time.hour
 
-            if datetime.fromisoformat(flight.act_time).date().isoformat() == skip_date:
+            if est_time.date().isoformat() == skip_date:
                 actual_data[hour] += 1
             else:
                 day = interval - (self.fixed_date.date() - est_time.date()).days - 1
@@ -772,4 +2063,202 @@ class Question6(FlightAnalyser):
             }
         )
         print(df)
-        print(f"Average Error: {sum(error) / len(error)}")
\ No newline at end of file
+        print(f"Average Error: {sum(error) / len(error)}")
+        return df
+
+class Question7(FlightAnalyser):
+    def __init__(self, loop):
+        super().__init__(loop)
+
+    @cached_solver
+    async def solver1(self, interval: int = 90, key: str = "route", late: int = 15):
+        """
+            Problem: Do late arrivals cause late departures of the same aircraft?
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            key: str
+                How arrivals and departures are matched, see FlightAnalyser.link_turnarounds
+            late: int
+                Flights delayed more than this number of minutes are counted as late
+        """
+        import pandas as pd
+
+        turnarounds = await self.link_turnarounds(interval, key)
+
+        late_inbound = turnarounds[turnarounds["Inbound Delay"] > late]
+        on_time_inbound = turnarounds[turnarounds["Inbound Delay"] <= late]
+
+        df = pd.DataFrame(
+            {
+                "Statistics": [
+                    "Turnarounds",
+                    "Mean Ground Time",
+                    "Delay Correlation",
+                    "Outbound Delay (Inbound Late)",
+                    "Outbound Delay (Inbound On Time)",
+                    "Late Outbound Rate (Inbound Late)",
+                    "Late Outbound Rate (Inbound On Time)",
+                ],
+                "Values": [
+                    len(turnarounds),
+                    turnarounds["Ground Time"].mean(),
+                    turnarounds["Inbound Delay"].corr(turnarounds["Outbound Delay"]),
+                    late_inbound["Outbound Delay"].mean(),
+                    on_time_inbound["Outbound Delay"].mean(),
+                    (late_inbound["Outbound Delay"] > late).mean(),
+                    (on_time_inbound["Outbound Delay"] > late).mean(),
+                ]
+            }
+        )
+
+        print(f"\rDelay Propagation of Turnarounds (matched by {key})")
+        print(df)
+        return df
+
+    @cached_solver
+    async def solver2(self, interval: int = 90, key: str = "route"):
+        """
+            Problem: Output the diagram of inbound delay against outbound delay.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            key: str
+                How arrivals and departures are matched, see FlightAnalyser.link_turnarounds
+        """
+        import matplotlib.pyplot as plt
+
+        turnarounds = await self.link_turnarounds(interval, key)
+
+        plt.scatter(turnarounds["Inbound Delay"], turnarounds["Outbound Delay"], c=turnarounds["Ground Time"], s=4)
+        plt.colorbar(label="Ground Time (in minutes)")
+
+        plt.title("Inbound Delay Against Outbound Delay of the Same Aircraft")
+        plt.xlabel("Inbound Delay (in minutes)")
+        plt.ylabel("Outbound Delay (in minutes)")
+
+class Question8(FlightAnalyser):
+    def __init__(self, loop):
+        super().__init__(loop)
+
+    @cached_solver
+    async def solver1(self, interval: int = 90, arrival: bool = True, window: int = 7):
+        """
+            Problem: How does the delay change over time? Output the rolling mean delay.
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            window: int
+                The number of days in each window.
+        """
+        import matplotlib.pyplot as plt
+
+        aggregates = await self.daily_aggregates(interval, arrival)
+        df = aggregates.rolling(window)
+
+        print(f"\r{window}-Day Rolling Statistics for Delays of {'Arrival' if arrival else 'Departure'} Flights")
+        print(df)
+
+        plt.plot(df["Date"], df["Mean"], label="Mean")
+        plt.fill_between(df["Date"], df["Median"], df["P90"], alpha=0.3, label="Median to 90th Percentile")
+        plt.legend()
+
+        plt.title(f"{window}-Day Rolling Delay of {'Arrival' if arrival else 'Departure'} Flights")
+        plt.xlabel("Date")
+        plt.ylabel("Delay (in minutes)")
+        return df
+
+    @cached_solver
+    async def solver2(self, interval: int = 90, arrival: bool = True):
+        """
+            Problem: What are the week-over-week flight counts?
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+        """
+        import matplotlib.pyplot as plt
+
+        aggregates = await self.daily_aggregates(interval, arrival)
+
+        # whole weeks ending at the last day
+        weeks = [(aggregates.day(end - 7), aggregates.day(end - 1)) for end in range(len(aggregates), 6, -7)][::-1]
+        df = aggregates.periods(weeks)
+        df["Change"] = df["Count"].pct_change()
+
+        print(f"\rWeekly Statistics of {'Arrival' if arrival else 'Departure'} Flights")
+        print(df)
+
+        plt.bar([first for first, _ in weeks], df["Count"], width=6, align="edge")
+
+        plt.title(f"Number of {'Arrival' if arrival else 'Departure'} Flights per Week")
+        plt.xlabel("Week")
+        plt.ylabel("Flight Count")
+        return df
+
+    @cached_solver
+    async def solver3(self, interval: int = 90, arrival: bool = True, first: str | None = None, second: str | None = None):
+        """
+            Problem: Compare the delays of two months.
+            By default the last two months of the checked days are compared (or just the last one if
+            the checked days are all in one month).
+
+            Parameters
+            ----------
+            interval: int
+                The number of days to be checked.
+            arrival: bool
+                True if asking for arrival flights, else asking for departure flights
+            first, second: str
+                The months to compare, in YYYY-MM format, they must overlap the checked days
+        """
+        import matplotlib.pyplot as plt
+
+        aggregates = await self.daily_aggregates(interval, arrival)
+
+        if len(aggregates) == 0:
+            raise ValueError("No day is checked, interval should be at least 1")
+        last_month = aggregates.day(len(aggregates) - 1).replace(day=1)
+        if first is None and second is None:
+            months = [last_month.strftime("%Y-%m")]
+            if aggregates.first_day < last_month:
+                months.insert(0, (last_month - timedelta(days=1)).strftime("%Y-%m"))
+        else:
+            if second is None:
+                second = last_month.strftime("%Y-%m")
+            if first is None:
+                first = (date.fromisoformat(f"{second}-01") - timedelta(days=1)).strftime("%Y-%m")
+            months = [first, second]
+
+        periods = []
+        for month in months:
+            first_day = date.fromisoformat(f"{month}-01")
+            last_day = (first_day + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            if last_day < aggregates.first_day or first_day > aggregates.day(len(aggregates) - 1):
+                raise ValueError(f"{month} is outside the checked days {aggregates.first_day} to {aggregates.day(len(aggregates) - 1)}")
+            periods.append((first_day, last_day))
+        df = aggregates.periods(periods)
+
+        print(f"\rComparison of Delays of {'Arrival' if arrival else 'Departure'} Flights")
+        print(df)
+
+        x = list(range(len(df)))
+        plt.bar([v - 0.2 for v in x], df["Mean"], width=0.4, label="Mean")
+        plt.bar([v + 0.2 for v in x], df["P90"], width=0.4, label="90th Percentile")
+        plt.xticks(x, months)
+        plt.legend()
+
+        plt.title(f"Delays of {'Arrival' if arrival else 'Departure'} Flights by Month")
+        plt.ylabel("Delay (in minutes)")
+        return df
@@ -0,0 +1,303 @@
+from airport import *
+from aiohttp import web
+import aiohttp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import inspect
+import io
+import json
+import os
+
+def render(catalogue: dict, question, solver_name: str, params: dict) -> dict:
+    """
+        Runs in a worker process: runs a solver on the shared data and returns its table (if any) and its figure as PNG
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    try:
+        table = run_solver(catalogue, question, solver_name, **params)
+        png = None
+        if plt.gca().has_data():
+            buffer = io.BytesIO()
+            plt.savefig(buffer, format="png")
+            png = buffer.getvalue()
+    finally:
+        plt.close("all")
+
+    if table is not None:
+        table = json.loads(table.to_json(orient="records"))
+    return {"table": table, "png": png}
+
+class AnalyticsService:
+    """
+        Local HTTP service answering QuestionX solvers from data kept in memory.
+        Responses are cached by question, solver, parameters and dataset version.
+        The event loop only looks up and coalesces requests, solvers run in worker processes
+        attached to the shared dataset.
+    """
+    questions = {
+        "1": Question1,
+        "2": Question2,
+        "3": Question3,
+        "4": Question4,
+        "5": Question5,
+        "6": Question6,
+        "7": Question7,
+        "8": Question8,
+    }
+    # parameters with a fixed format or range, name -> (check, description for the error)
+    formats = {
+        "interval": (lambda value: value >= 1, "a positive integer"),
+        "window": (lambda value: value >= 1, "a positive integer"),
+        "bin_size": (lambda value: value >= 1, "a positive integer"),
+        "key": (lambda value: value in ("route", "flight", "airline"), "route, flight or airline"),
+        "first": (lambda value: bool(datetime.strptime(value, "%Y-%m")), "a month in YYYY-MM format"),
+        "second": (lambda value: bool(datetime.strptime(value, "%Y-%m")), "a month in YYYY-MM format"),
+        "skip_date": (lambda value: bool(date.fromisoformat(value)), "a date in YYYY-MM-DD format"),
+    }
+    interval: int # number of days kept in memory
+    cache_size: int # number of responses kept in the cache
+    dataset: SharedFlightData | None
+    version: tuple | None # fingerprint of the day files the dataset was built from
+
+    workers: int | None # number of worker processes, None for one per CPU
+
+    def __init__(self, interval: int = 90, cache_size: int = 256, workers: int | None = None):
+        self.interval = interval
+        self.cache_size = cache_size
+        self.workers = workers
+        self.dataset = None
+        self.version = None
+        self.pool = None
+        self.users = {} # dataset -> number of computations using it
+        self.retired = [] # replaced datasets still used by some computation
+        self.cache = OrderedDict()
+        self.pending = {} # cache key -> task computing it, so identical requests wait for the same work
+        self.load_lock = asyncio.Lock()
+
+    def dataset_version(self):
+        """
+            Returns the name, size and modification time of every day file kept in memory
+        """
+        today = FlightAnalyser.fixed_date
+        version = []
+        for curr_date in [(today - timedelta(days=self.interval)).date() + timedelta(days=i) for i in range(self.interval + 1)]:
+            for direction in ("arrival", "departure"):
+                path = Fetcher.static_path(direction, curr_date)
+                try:
+                    stat = os.stat(path)
+                    version.append((path, stat.st_size, stat.st_mtime_ns))
+                except FileNotFoundError:
+                    version.append((path, None, None))
+        return tuple(version)
+
+    async def refresh(self):
+        """
+            Reloads the dataset if any day file changed since it was loaded
+        """
+        version = self.dataset_version()
+        if version == self.version:
+            return
+
+        async with self.load_lock:
+            if version == self.version:
+                return
+
+            loader = FlightAnalyser(asyncio.get_running_loop())
+            try:
+                dataset = await SharedFlightData.load(loader, self.interval)
+            finally:
+                await loader.finish()
+
+            old, self.dataset, self.version = self.dataset, dataset, version
+            if old is not None:
+                # workers may still be reading the old data, free it when the last one finishes
+                if self.users.get(old, 0) == 0:
+                    old.unlink()
+                else:
+                    self.retired.append(old)
+
+    def acquire(self) -> SharedFlightData:
+        self.users[self.dataset] = self.users.get(self.dataset, 0) + 1
+        return self.dataset
+
+    def release(self, dataset: SharedFlightData):
+        self.users[dataset] -= 1
+        if self.users[dataset] == 0:
+            del self.users[dataset]
+            if dataset in self.retired:
+                self.retired.remove(dataset)
+                dataset.unlink()
+
+    def parse_params(self, solver, query) -> dict:
+        """
+            Converts the query string into solver arguments using the solver's annotations
+        """
+        signature = inspect.signature(solver)
+        params = {}
+        for name, value in query.items():
+            if name == "format":
+                continue
+            if name not in signature.parameters:
+                raise web.HTTPBadRequest(reason=f"Unknown parameter {name}")
+
+            annotation = signature.parameters[name].annotation
+            if annotation is bool:
+                params[name] = value.lower() in ("1", "true", "yes")
+            elif annotation is int:
+                try:
+                    params[name] = int(value)
+                except ValueError:
+                    raise web.HTTPBadRequest(reason=f"Parameter {name} should be an integer")
+            else:
+                params[name] = value
+
+            if name in self.formats:
+                check, description = self.formats[name]
+                try:
+                    valid = check(params[name])
+                except ValueError:
+                    valid = False
+                if not valid:
+                    raise web.HTTPBadRequest(reason=f"Parameter {name} should be {description}")
+
+        if params.get("interval", 0) > self.interval:
+            raise web.HTTPBadRequest(reason=f"Only the last {self.interval} days are loaded")
+        return params
+
+    async def compute(self, dataset: SharedFlightData, number: str, solver_name: str, params: dict) -> dict:
+        """
+            Runs a solver in a worker process, so the loop keeps answering other requests
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, render, dataset.catalogue, self.questions[number], solver_name, params)
+        finally:
+            self.release(dataset)
+
+    async def lookup(self, key, number: str, solver_name: str, params: dict) -> tuple[dict, bool]:
+        """
+            Returns the cached result of `key` and whether it was a hit, computing it at most once
+        """
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key], True
+
+        if key not in self.pending:
+            # take the dataset now, a refresh before the task starts must not free it
+            self.pending[key] = asyncio.ensure_future(self.compute(self.acquire(), number, solver_name, params))
+        task = self.pending[key]
+        try:
+            # shield so one client disconnecting does not cancel the work for the others
+            result = await asyncio.shield(task)
+        finally:
+            if task.done() and self.pending.get(key) is task:
+                del self.pending[key]
+
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result, False
+
+    async def handle_index(self, request):
+        res = {}
+        for number, question in self.questions.items():
+            res[number] = {
+                name: [param for param in inspect.signature(method).parameters if param != "self"]
+                for name, method in inspect.getmembers(question, inspect.iscoroutinefunction) if name.startswith("solver")
+            }
+        return web.json_response(res)
+
+    async def handle_question(self, request):
+        number = request.match_info["number"]
+        solver_name = request.match_info["solver"]
+        output = request.query.get("format", "json")
+
+        if number not in self.questions:
+            raise web.HTTPNotFound(reason=f"No question {number}")
+        if not solver_name.startswith("solver") or not hasattr(self.questions[number], solver_name):
+            raise web.HTTPNotFound(reason=f"Question{number} has no {solver_name}")
+        if output not in ("json", "png"):
+            raise web.HTTPBadRequest(reason="format should be json or png")
+
+        params = self.parse_params(getattr(self.questions[number], solver_name), request.query)
+
+        await self.refresh()
+        key = (number, solver_name, tuple(sorted(params.items())), self.version)
+        try:
+            result, hit = await self.lookup(key, number, solver_name, params)
+        except web.HTTPException:
+            raise
+        except ValueError as e:
+            # solvers raise ValueError for arguments they cannot answer, e.g. a month outside the checked days
+            return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=400)
+        except Exception as e:
+            return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=500)
+
+        headers = {"X-Cache": "hit" if hit else "miss"}
+        if output == "png":
+            if result["png"] is None:
+                raise web.HTTPNotFound(reason=f"Question{number}.{solver_name} draws no figure")
+            return web.Response(body=result["png"], content_type="image/png", headers=headers)
+
+        if result["table"] is None:
+            raise web.HTTPNotFound(reason=f"Question{number}.{solver_name} has no table, use format=png")
+        return web.json_response({"table": result["table"]}, headers=headers)
+
+    async def load_airport_info(self):
+        """
+            Downloads the airport info once, so the workers do not each download it
+        """
+        fetcher = Fetcher(asyncio.get_running_loop())
+        try:
+            await fetcher.fetch_airport_info()
+        except aiohttp.ClientError as e:
+            # the questions without airport info still work, the workers try again when asked
+            print(f"Cannot load the airport info, it will be downloaded on demand: {type(e).__name__}: {e}")
+        finally:
+            await fetcher.close()
+
+    async def on_startup(self, app):
+        import multiprocessing
+
+        await self.load_airport_info()
+        # spawn, forking a process with a running event loop is not safe
+        self.pool = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"),
+            # every worker starts with the airport info of the service
+            initializer=Fetcher.set_airport_info, initargs=(Fetcher.airport_info_cache, Fetcher.airport_info_fetched)
+        )
+        await self.refresh()
+
+    async def on_cleanup(self, app):
+        self.pool.shutdown()
+        for dataset in self.retired:
+            dataset.unlink()
+        if self.dataset is not None:
+            self.dataset.unlink()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/questions", self.handle_index)
+        app.router.add_get("/question/{number}/{solver}", self.handle_question)
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local analytics service for the flight data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--interval", type=int, default=90, help="number of days kept in memory")
+    parser.add_argument("--cache-size", type=int, default=256, help="number of responses kept in the cache")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes running the solvers")
+    args = parser.parse_args()
+
+    service = AnalyticsService(args.interval, args.cache_size, args.workers)
+    web.run_app(service.app(), host=args.host, port=args.port)